@@ -0,0 +1,512 @@
+#!/usr/bin/env python3
+"""Broker statement ingestion.
+
+Stream-parses MT4/MT5 statements (HTML or CSV) and cTrader history exports
+row by row and maps every closed deal onto the ``TradeBase`` fields. Each deal
+gets a stable fingerprint which is stored under a unique index, so importing
+an overlapping statement again only inserts the deals that are new.
+
+Usage:
+    python ingest.py [--account ACCOUNT] statement.html [statement2.csv ...]
+"""
+import codecs
+import csv
+import hashlib
+import os
+import re
+import uuid
+from datetime import datetime
+from html.parser import HTMLParser
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from pymongo.errors import BulkWriteError
+
+CHUNK_SIZE = 64 * 1024
+BATCH_SIZE = 500
+DUPLICATE_KEY_ERROR = 11000
+
+# Normalized column header -> trade field. Headers that appear twice in MT4/MT5
+# statements (open/close "Time" and "Price") are resolved by occurrence.
+COLUMN_ALIASES = {
+    "ticket": "ticket",
+    "position": "ticket",
+    "positionid": "ticket",
+    "id": "ticket",
+    "order": "ticket",
+    "symbol": "pair",
+    "item": "pair",
+    "pair": "pair",
+    "type": "direction",
+    "direction": "direction",
+    "openingdirection": "direction",
+    "side": "direction",
+    "size": "volume",
+    "volume": "volume",
+    "lots": "volume",
+    "quantity": "volume",
+    "closingquantity": "volume",
+    "opentime": "open_time",
+    "openingtime": "open_time",
+    "openingdate": "open_time",
+    "closetime": "close_time",
+    "closingtime": "close_time",
+    "closingdate": "close_time",
+    "openprice": "entry_price",
+    "entryprice": "entry_price",
+    "closeprice": "exit_price",
+    "closingprice": "exit_price",
+    "sl": "stop_loss",
+    "stoploss": "stop_loss",
+    "tp": "take_profit",
+    "takeprofit": "take_profit",
+    "commission": "commission",
+    "swap": "swap",
+    "taxes": "taxes",
+    "profit": "profit",
+    "net": "net_profit",
+    "netprofit": "net_profit",
+    "comment": "notes",
+}
+# cTrader names its P&L columns after the deposit currency ("Net USD", "Gross EUR")
+CURRENCY_COLUMNS = re.compile(r"(?P<kind>net|gross)(?:profit)?(?:[a-z]{3})?")
+CURRENCY_COLUMN_FIELDS = {"net": "net_profit", "gross": "profit"}
+REPEATED_COLUMNS = {
+    "time": ("open_time", "close_time"),
+    "price": ("entry_price", "exit_price"),
+}
+# Open positions tables (MT4 "Open Trades") also have two prices and a profit,
+# but no close time; their floating P&L must not be imported as a closed deal.
+REQUIRED_COLUMNS = {"pair", "direction", "close_time", "entry_price", "exit_price"}
+
+DATE_FORMATS = [
+    "%Y.%m.%d %H:%M:%S",
+    "%Y.%m.%d %H:%M",
+    "%Y.%m.%d",
+    "%Y-%m-%d %H:%M:%S",
+    "%Y-%m-%dT%H:%M:%S",
+    "%Y-%m-%d",
+    "%d/%m/%Y %H:%M:%S",
+    "%d/%m/%Y %H:%M",
+    "%d/%m/%Y",
+]
+
+
+def _normalize_header(header: str) -> str:
+    return re.sub(r"[^a-z]", "", header.lower())
+
+
+def map_header(row: List[str]) -> Optional[Dict[int, str]]:
+    """Map a header row to ``{column index: field}``.
+
+    Returns None unless the row describes a table of closed trades, i.e. has
+    a symbol, a direction, a close time, an entry and an exit price and a
+    profit column.
+    """
+    columns = {}
+    seen = {}
+    for index, cell in enumerate(row):
+        name = _normalize_header(cell)
+        if name in REPEATED_COLUMNS:
+            occurrence = seen.get(name, 0)
+            seen[name] = occurrence + 1
+            if occurrence < len(REPEATED_COLUMNS[name]):
+                columns[index] = REPEATED_COLUMNS[name][occurrence]
+        else:
+            field = COLUMN_ALIASES.get(name)
+            currency_column = CURRENCY_COLUMNS.fullmatch(name)
+            if field is None and currency_column:
+                field = CURRENCY_COLUMN_FIELDS[currency_column.group("kind")]
+            if field is not None and field not in columns.values():
+                columns[index] = field
+
+    fields = set(columns.values())
+    if REQUIRED_COLUMNS <= fields and fields & {"profit", "net_profit"}:
+        return columns
+    return None
+
+
+def _parse_float(value: Optional[str], decimal: Optional[str] = None) -> Optional[float]:
+    """Parse a number written with either "." or "," as the decimal point.
+
+    The separator that comes last is the decimal point and the other one groups
+    thousands ("1.234,56", "1,234.56"). A single separator followed by exactly
+    three digits ("1,000") can be either, so ``decimal`` - the statement's
+    convention - decides; without it such values raise ValueError, as do values
+    that are not numbers at all.
+    """
+    if value is None:
+        return None
+    # Drop digit grouping spaces and trailing units or currencies ("0.01 Lots", "10.00 USD")
+    number = re.sub(r"[\s']", "", value)
+    number = re.sub(r"[A-Za-z$\u20ac\xa3]+$", "", number)
+    if not number:
+        return None
+
+    if "," in number and "." in number:
+        separator = "," if number.rfind(",") > number.rfind(".") else "."
+    elif "," in number or "." in number:
+        found = "," if "," in number else "."
+        fraction = number.rpartition(found)[2]
+        if number.count(found) > 1:
+            # Only thousands separators repeat
+            separator = "." if found == "," else ","
+        elif len(fraction) != 3:
+            separator = found
+        elif decimal is not None:
+            separator = decimal
+        else:
+            raise ValueError(f"Ambiguous number {value!r}: cannot tell the decimal point apart")
+    else:
+        separator = "."
+
+    grouping = "." if separator == "," else ","
+    pattern = r"[+-]?(?:\d{1,3}(?:%s\d{3})+|\d+)(?:%s\d+)?" % (re.escape(grouping), re.escape(separator))
+    if not re.fullmatch(pattern, number):
+        raise ValueError(f"Cannot read number {value!r}")
+    return float(number.replace(grouping, "").replace(separator, "."))
+
+
+def _parse_datetime(value: Optional[str]) -> Optional[datetime]:
+    value = (value or "").strip()
+    # Drop fractional seconds, e.g. cTrader's "28/07/2025 10:15:02.123"
+    value = re.sub(r"(\d{2}:\d{2}:\d{2})\.\d+", r"\1", value)
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+    return None
+
+
+def fingerprint(deal: dict) -> str:
+    """Stable identity of a deal, independent of which statement it came from.
+
+    Times are hashed in their parsed form, so the same deal exported with a
+    different date format or precision keeps its fingerprint.
+    """
+    parts = [
+        deal.get("ticket") or "",
+        deal["pair"].upper(),
+        deal["direction"],
+        deal["open_time"].isoformat() if deal.get("open_time") else "",
+        deal["close_time"].isoformat() if deal.get("close_time") else "",
+        repr(deal["entry_price"]),
+        repr(deal["exit_price"]),
+        repr(deal.get("volume")),
+        repr(deal["result_amount"]),
+    ]
+    return hashlib.sha1("|".join(parts).encode("utf-8")).hexdigest()
+
+
+def map_row(columns: Dict[int, str], row: List[str], decimal: Optional[str] = None) -> Optional[dict]:
+    """Map a statement row onto the ``TradeBase`` fields plus a fingerprint.
+
+    Returns None for rows that are not closed buy/sell deals (balance
+    operations, cancelled pending orders, totals, ...).
+    """
+    raw = {field: row[index].strip() for index, field in columns.items() if index < len(row)}
+
+    direction = raw.get("direction", "").lower()
+    if direction not in ("buy", "sell"):
+        return None
+
+    entry_price = _parse_float(raw.get("entry_price"), decimal)
+    exit_price = _parse_float(raw.get("exit_price"), decimal)
+    if entry_price is None or exit_price is None or not raw.get("pair"):
+        return None
+
+    if "net_profit" in raw:
+        result_amount = _parse_float(raw["net_profit"], decimal)
+    else:
+        result_amount = _parse_float(raw.get("profit"), decimal)
+        if result_amount is not None:
+            for fee in ("commission", "swap", "taxes"):
+                result_amount += _parse_float(raw.get(fee), decimal) or 0.0
+    if result_amount is None:
+        return None
+
+    # Still open positions have no close time
+    close_time = _parse_datetime(raw.get("close_time"))
+    if close_time is None:
+        return None
+
+    stop_loss = _parse_float(raw.get("stop_loss"), decimal) or None
+    take_profit = _parse_float(raw.get("take_profit"), decimal) or None
+
+    # P&L is linear in the price move, so the amount at risk is the realised
+    # result scaled by the stop distance over the distance actually travelled.
+    risk_amount = 0.0
+    if stop_loss is not None and exit_price != entry_price:
+        risk_amount = abs(result_amount) * abs(entry_price - stop_loss) / abs(exit_price - entry_price)
+
+    deal = {
+        "ticket": raw.get("ticket"),
+        "pair": raw["pair"],
+        "direction": direction,
+        "open_time": _parse_datetime(raw.get("open_time")),
+        "close_time": close_time,
+        "entry_price": entry_price,
+        "exit_price": exit_price,
+        "volume": _parse_float(raw.get("volume"), decimal),
+        "result_amount": round(result_amount, 2),
+    }
+
+    return {
+        "date": close_time.strftime("%Y-%m-%d"),
+        "pair": deal["pair"],
+        "direction": direction,
+        "entry_price": entry_price,
+        "exit_price": exit_price,
+        "stop_loss": stop_loss,
+        "take_profit": take_profit,
+        "risk_amount": round(risk_amount, 2),
+        "result_amount": deal["result_amount"],
+        "notes": raw.get("notes", ""),
+        "fingerprint": fingerprint(deal),
+    }
+
+
+def map_rows(rows: Iterable[List[str]], decimal: Optional[str] = None) -> Iterator[dict]:
+    """Yield trades from a stream of table rows, tracking the current header.
+
+    ``decimal`` is the statement's decimal point, used for numbers that could
+    be read either way. Raises ValueError if the rows contain no closed trades
+    table.
+    """
+    columns = None
+    found_table = False
+    for row in rows:
+        header = map_header(row)
+        if header is not None:
+            columns = header
+            found_table = True
+            continue
+        # A titled section (e.g. MT5 "Orders", "Deals") ends the trades table
+        if columns is not None and len([cell for cell in row if cell.strip()]) == 1:
+            columns = None
+            continue
+        if columns is not None:
+            trade = map_row(columns, row, decimal)
+            if trade is not None:
+                yield trade
+
+    if not found_table:
+        raise ValueError("No trades table found in statement")
+
+
+def iter_text(stream, chunk_size: int = CHUNK_SIZE) -> Iterator[str]:
+    """Decode a binary stream chunk by chunk, honouring UTF-8/UTF-16 BOMs.
+
+    MT5 writes its reports as UTF-16, MT4 and cTrader as UTF-8.
+    """
+    head = stream.read(chunk_size)
+    if head.startswith(codecs.BOM_UTF8):
+        encoding = "utf-8-sig"
+    elif head.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        encoding = "utf-16"
+    else:
+        encoding = "utf-8"
+    decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+
+    chunk = head
+    while chunk:
+        text = decoder.decode(chunk)
+        if text:
+            yield text
+        chunk = stream.read(chunk_size)
+    tail = decoder.decode(b"", final=True)
+    if tail:
+        yield tail
+
+
+def iter_lines(chunks: Iterable[str]) -> Iterator[str]:
+    pending = ""
+    for chunk in chunks:
+        pending += chunk
+        lines = pending.splitlines(keepends=True)
+        pending = lines.pop() if lines and not lines[-1].endswith(("\n", "\r")) else ""
+        yield from lines
+    if pending:
+        yield pending
+
+
+def csv_delimiter(line: str) -> str:
+    return max(",;\t", key=line.count)
+
+
+def iter_csv_rows(chunks: Iterable[str]) -> Iterator[List[str]]:
+    lines = iter_lines(chunks)
+    first = next(lines, None)
+    if first is None:
+        return
+    delimiter = csv_delimiter(first)
+
+    def all_lines():
+        yield first
+        yield from lines
+
+    yield from csv.reader(all_lines(), delimiter=delimiter)
+
+
+class _TableRowParser(HTMLParser):
+    """Collects ``<tr>`` cell texts as the document is fed in chunks."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.rows = []
+        self._row = None
+        self._cell = None
+        self._colspan = 1
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "tr":
+            self._row = []
+        elif tag in ("td", "th") and self._row is not None:
+            self._cell = []
+            # Keep positional alignment for merged header cells
+            colspan = dict(attrs).get("colspan")
+            self._colspan = int(colspan) if colspan and colspan.isdigit() else 1
+
+    def handle_data(self, data):
+        if self._cell is not None:
+            self._cell.append(data)
+
+    def handle_endtag(self, tag):
+        if tag in ("td", "th") and self._cell is not None:
+            self._row.append(" ".join("".join(self._cell).split()))
+            self._row.extend([""] * (self._colspan - 1))
+            self._cell = None
+        elif tag == "tr" and self._row is not None:
+            self.rows.append(self._row)
+            self._row = None
+
+
+def iter_html_rows(chunks: Iterable[str]) -> Iterator[List[str]]:
+    parser = _TableRowParser()
+    for chunk in chunks:
+        parser.feed(chunk)
+        yield from parser.rows
+        parser.rows = []
+    parser.close()
+    yield from parser.rows
+
+
+def detect_format(filename: Optional[str], first_chunk: str) -> str:
+    extension = os.path.splitext(filename or "")[1].lower()
+    if extension in (".htm", ".html"):
+        return "html"
+    if extension in (".csv", ".txt"):
+        return "csv"
+    return "html" if "<table" in first_chunk.lower() else "csv"
+
+
+def parse_statement(stream, filename: Optional[str] = None) -> Iterator[dict]:
+    """Yield trade documents from a binary statement stream, row by row."""
+    chunks = iter_text(stream)
+    first = next(chunks, "")
+
+    def all_chunks():
+        yield first
+        yield from chunks
+
+    # MT4/MT5 reports always use a decimal point; ";"-separated exports use a decimal comma
+    if detect_format(filename, first) == "html":
+        rows = iter_html_rows(all_chunks())
+        decimal = "."
+    else:
+        rows = iter_csv_rows(all_chunks())
+        decimal = "," if csv_delimiter(first.split("\n", 1)[0]) == ";" else "."
+    return map_rows(rows, decimal)
+
+
+async def _insert_batch(collection, batch: List[dict]) -> int:
+    """Insert a batch, returning how many documents were duplicates."""
+    try:
+        await collection.insert_many(batch, ordered=False)
+    except BulkWriteError as e:
+        errors = e.details.get("writeErrors", [])
+        if any(error.get("code") != DUPLICATE_KEY_ERROR for error in errors):
+            raise
+        return len(errors)
+    return 0
+
+
+async def import_statement(
+    collection, stream, filename: Optional[str] = None, account_id: str = "default", validate=None, progress=None
+) -> dict:
+    """Stream a statement into ``account_id``, skipping deals already imported into it.
+
+    ``validate`` is called with every mapped trade (e.g. ``TradeBase``) before
+    it is queued for insertion. ``progress`` is awaited after every batch.
+    """
+    parsed = 0
+    duplicates = 0
+    batch = []
+
+    for trade in parse_statement(stream, filename):
+        trade["account_id"] = account_id
+        if validate is not None:
+            validate(**{k: v for k, v in trade.items() if k != "fingerprint"})
+        now = datetime.utcnow()
+        trade["id"] = str(uuid.uuid4())
+        trade["created_at"] = now
+        trade["updated_at"] = now
+        batch.append(trade)
+        parsed += 1
+
+        if len(batch) >= BATCH_SIZE:
+            duplicates += await _insert_batch(collection, batch)
+            batch = []
+            if progress is not None:
+                await progress()
+
+    if batch:
+        duplicates += await _insert_batch(collection, batch)
+
+    return {
+        "parsed": parsed,
+        "imported": parsed - duplicates,
+        "duplicates": duplicates,
+    }
+
+
+def main():
+    import argparse
+    import asyncio
+
+    from server import (
+        DEFAULT_ACCOUNT_ID,
+        TradeBase,
+        ensure_indexes,
+        invalidate_stats,
+        migrate_accounts,
+        trades_collection,
+    )
+
+    parser = argparse.ArgumentParser(description="Import MT4/MT5/cTrader statements into the trade journal")
+    parser.add_argument("statements", nargs="+", help="Statement files (.html or .csv)")
+    parser.add_argument("--account", default=DEFAULT_ACCOUNT_ID, help="Trading account to import into")
+    args = parser.parse_args()
+
+    async def run():
+        await migrate_accounts()
+        await ensure_indexes()
+        for path in args.statements:
+            try:
+                with open(path, "rb") as stream:
+                    summary = await import_statement(trades_collection, stream, path, args.account, validate=TradeBase)
+            except ValueError as e:
+                print(f"{path}: {e}")
+                continue
+            finally:
+                await invalidate_stats(args.account)
+            print(
+                f"{path}: {summary['imported']} imported, "
+                f"{summary['duplicates']} duplicates skipped ({summary['parsed']} deals)"
+            )
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+"""In-process background jobs.
+
+Long-running work (exports, imports, analytics) is queued as a job record in
+MongoDB and executed on the event loop by a bounded pool of workers, so the
+request that started it returns immediately with a job id. Workers report
+progress on the record, and file results are written to ``results_dir`` for
+download once the job has completed. Files of failed jobs, and the input
+files jobs were given, are removed when the job ends.
+"""
+import asyncio
+import glob
+import logging
+import os
+import uuid
+from datetime import datetime, timedelta
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+
+
+class JobContext:
+    """Handle passed to a job function for reporting progress and results."""
+
+    def __init__(self, runner: "JobRunner", job_id: str):
+        self.runner = runner
+        self.id = job_id
+        self.result_file = None
+        self._progress = 0
+
+    def result_path(self, extension: str) -> str:
+        """Path the job should write its downloadable result to."""
+        self.result_file = f"{self.id}{extension}"
+        return os.path.join(self.runner.results_dir, self.result_file)
+
+    async def progress(self, done: int, total: int):
+        """Record progress, only touching the database when the percentage moves."""
+        percent = min(99, int(done * 100 / total)) if total else 0
+        if percent > self._progress:
+            self._progress = percent
+            await self.runner.update(self.id, progress=percent)
+
+
+class JobRunner:
+    """Runs at most ``max_workers`` jobs at a time, leaving the rest queued."""
+
+    def __init__(self, collection, results_dir: str, max_workers: int = 2):
+        self.collection = collection
+        self.results_dir = results_dir
+        self._slots = asyncio.Semaphore(max_workers)
+        self._tasks = set()
+        self._purger = None
+        os.makedirs(results_dir, exist_ok=True)
+
+    def _remove_files(self, job: dict, results: bool = True):
+        """Delete a job's input file and, with ``results``, anything it wrote."""
+        paths = [job["input_file"]] if job.get("input_file") else []
+        if results:
+            # Partial results of interrupted jobs are not recorded yet, but are named after the job
+            paths += glob.glob(os.path.join(self.results_dir, f"{job['id']}.*"))
+        for path in paths:
+            if os.path.exists(path):
+                os.remove(path)
+
+    async def recover(self):
+        """Fail jobs left queued or running by a previous process."""
+        stale = {"status": {"$in": [QUEUED, RUNNING]}}
+        async for job in self.collection.find(stale):
+            self._remove_files(job)
+
+        await self.collection.update_many(
+            stale,
+            {"$set": {
+                "status": FAILED,
+                "error": "Interrupted by server restart",
+                "finished_at": datetime.utcnow(),
+            }},
+        )
+
+    async def purge(self, older_than: timedelta):
+        """Delete records and result files of jobs that finished before ``older_than`` ago."""
+        expired = {
+            "status": {"$in": [COMPLETED, FAILED]},
+            "finished_at": {"$lt": datetime.utcnow() - older_than},
+        }
+        ids = []
+        async for job in self.collection.find(expired):
+            self._remove_files(job)
+            ids.append(job["id"])
+
+        if ids:
+            await self.collection.delete_many({"id": {"$in": ids}})
+
+    def start_purging(self, older_than: timedelta, interval: timedelta):
+        """Purge expired jobs now and then every ``interval`` until ``stop_purging``."""
+        async def purge_forever():
+            while True:
+                try:
+                    await self.purge(older_than)
+                except Exception:
+                    logger.exception("Purging expired jobs failed")
+                await asyncio.sleep(interval.total_seconds())
+
+        self._purger = asyncio.create_task(purge_forever())
+
+    def stop_purging(self):
+        if self._purger is not None:
+            self._purger.cancel()
+            self._purger = None
+
+    async def submit(self, account_id: str, kind: str, func, *args, input_file: Optional[str] = None) -> dict:
+        """Persist a job record for ``account_id`` and schedule ``func(job, *args)`` to run.
+
+        ``input_file`` is deleted once the job has finished, whatever the outcome.
+        """
+        job = {
+            "id": str(uuid.uuid4()),
+            "account_id": account_id,
+            "kind": kind,
+            "input_file": input_file,
+            "status": QUEUED,
+            "progress": 0,
+            "result": None,
+            "result_file": None,
+            "error": None,
+            "created_at": datetime.utcnow(),
+            "started_at": None,
+            "finished_at": None,
+        }
+        await self.collection.insert_one(job)
+
+        task = asyncio.create_task(self._run(job["id"], input_file, func, args))
+        # The event loop only keeps weak references to tasks
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return job
+
+    async def update(self, job_id: str, **fields):
+        await self.collection.update_one({"id": job_id}, {"$set": fields})
+
+    async def _run(self, job_id: str, input_file: Optional[str], func, args):
+        async with self._slots:
+            await self.update(job_id, status=RUNNING, started_at=datetime.utcnow())
+            job = JobContext(self, job_id)
+            try:
+                result = await func(job, *args)
+            except Exception as e:
+                self._remove_files({"id": job_id, "input_file": input_file})
+                await self.update(
+                    job_id,
+                    status=FAILED,
+                    error=str(e),
+                    finished_at=datetime.utcnow(),
+                )
+            else:
+                self._remove_files({"id": job_id, "input_file": input_file}, results=False)
+                await self.update(
+                    job_id,
+                    status=COMPLETED,
+                    progress=100,
+                    result=result,
+                    result_file=job.result_file,
+                    finished_at=datetime.utcnow(),
+                )
+
+    def result_path(self, job: dict) -> Optional[str]:
+        if not job.get("result_file"):
+            return None
+        return os.path.join(self.results_dir, job["result_file"])
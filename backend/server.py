@@ -1,14 +1,21 @@
 from fastapi import FastAPI, HTTPException, Depends, Form, UploadFile, File
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import FileResponse
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo.errors import DuplicateKeyError
 from pydantic import BaseModel, Field
-from typing import List, Optional
-from datetime import datetime
+from typing import Any, Dict, List, Optional
+from datetime import datetime, timedelta
+import asyncio
+import json
 import os
 import uuid
 from dotenv import load_dotenv
 import shutil
 
+from ingest import import_statement
+from jobs import COMPLETED, JobRunner
+
 # Load environment variables
 load_dotenv()
 
@@ -32,7 +39,17 @@ app.add_middleware(
 MONGO_URL = os.getenv("MONGO_URL", "mongodb://localhost:27017")
 DATABASE_NAME = "trade_journal"
 COLLECTION_NAME = "trades"
+JOBS_COLLECTION_NAME = "jobs"
+ACCOUNT_STATS_COLLECTION_NAME = "account_stats"
+# Account used for trades created without one, including trades from before accounts existed
+DEFAULT_ACCOUNT_ID = "default"
 UPLOADS_DIR = "uploads"
+JOBS_DIR = "job_results"
+# Background jobs allowed to run at once; the rest wait in the queue
+MAX_CONCURRENT_JOBS = int(os.getenv("MAX_CONCURRENT_JOBS", "2"))
+# Finished jobs and their result files are deleted after this many days
+JOB_RETENTION_DAYS = int(os.getenv("JOB_RETENTION_DAYS", "7"))
+JOB_PURGE_INTERVAL = timedelta(hours=1)
 
 # Create uploads directory if it doesn't exist
 os.makedirs(UPLOADS_DIR, exist_ok=True)
@@ -41,9 +58,70 @@ os.makedirs(UPLOADS_DIR, exist_ok=True)
 client = AsyncIOMotorClient(MONGO_URL)
 database = client[DATABASE_NAME]
 trades_collection = database[COLLECTION_NAME]
+jobs_collection = database[JOBS_COLLECTION_NAME]
+account_stats_collection = database[ACCOUNT_STATS_COLLECTION_NAME]
+job_runner = JobRunner(jobs_collection, JOBS_DIR, MAX_CONCURRENT_JOBS)
+
+
+# Indexes from before trades were partitioned by account
+LEGACY_INDEXES = ["fingerprint_1", "trades_text"]
+
+
+async def ensure_indexes():
+    existing = await trades_collection.index_information()
+    for name in LEGACY_INDEXES:
+        if name in existing:
+            await trades_collection.drop_index(name)
+
+    # Every trade query is scoped by account, so all indexes lead with it
+    await trades_collection.create_index([("account_id", 1), ("id", 1)], unique=True)
+    await trades_collection.create_index([("account_id", 1), ("date", -1)])
+    # Imported deals carry a fingerprint; manually entered trades don't
+    await trades_collection.create_index(
+        [("account_id", 1), ("fingerprint", 1)],
+        unique=True,
+        partialFilterExpression={"fingerprint": {"$exists": True}},
+    )
+    # Full-text search over notes and pairs, pair matches rank higher
+    await trades_collection.create_index(
+        [("account_id", 1), ("notes", "text"), ("pair", "text")],
+        weights={"pair": 5, "notes": 1},
+        name="account_trades_text",
+    )
+    await jobs_collection.create_index([("account_id", 1), ("created_at", -1)])
+    await jobs_collection.create_index("id", unique=True)
+    await account_stats_collection.create_index("account_id", unique=True)
+
+
+async def migrate_accounts():
+    # Trades and jobs created before accounts existed belong to the default account
+    for collection in (trades_collection, jobs_collection):
+        await collection.update_many(
+            {"account_id": {"$exists": False}},
+            {"$set": {"account_id": DEFAULT_ACCOUNT_ID}},
+        )
+    # Stats cached before generations were tracked
+    await account_stats_collection.update_many(
+        {"generation": {"$exists": False}},
+        {"$set": {"generation": 0}, "$unset": {"stats": ""}},
+    )
+
+
+@app.on_event("startup")
+async def startup():
+    await migrate_accounts()
+    await ensure_indexes()
+    await job_runner.recover()
+    job_runner.start_purging(timedelta(days=JOB_RETENTION_DAYS), JOB_PURGE_INTERVAL)
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    job_runner.stop_purging()
 
 # Pydantic models
 class TradeBase(BaseModel):
+    account_id: str = DEFAULT_ACCOUNT_ID
     date: str
     pair: str
     direction: str  # 'buy' or 'sell'
@@ -81,10 +159,23 @@ class Trade(TradeBase):
     class Config:
         from_attributes = True
 
+class Job(BaseModel):
+    id: str
+    account_id: str
+    kind: str
+    status: str  # 'queued', 'running', 'completed' or 'failed'
+    progress: int
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
 # Helper function to convert MongoDB document to Trade model
 def trade_helper(trade) -> dict:
     return {
         "id": trade["id"],
+        "account_id": trade["account_id"],
         "date": trade["date"],
         "pair": trade["pair"],
         "direction": trade["direction"],
@@ -100,12 +191,34 @@ def trade_helper(trade) -> dict:
         "updated_at": trade["updated_at"],
     }
 
+# Helper function to convert MongoDB document to Job model
+def job_helper(job) -> dict:
+    return {
+        "id": job["id"],
+        "account_id": job["account_id"],
+        "kind": job["kind"],
+        "status": job["status"],
+        "progress": job["progress"],
+        "result": job.get("result"),
+        "error": job.get("error"),
+        "created_at": job["created_at"],
+        "started_at": job.get("started_at"),
+        "finished_at": job.get("finished_at"),
+    }
+
 @app.get("/")
 async def root():
     return {"message": "Trade Journal API is running"}
 
+@app.get("/api/accounts")
+async def get_accounts():
+    """Get the IDs of all accounts that have trades"""
+    account_ids = await trades_collection.distinct("account_id")
+    return {"accounts": sorted(account_ids)}
+
 @app.post("/api/trades", response_model=Trade)
 async def create_trade(
+    account_id: str = Form(DEFAULT_ACCOUNT_ID),
     date: str = Form(...),
     pair: str = Form(...),
     direction: str = Form(...),
@@ -120,6 +233,7 @@ async def create_trade(
 ):
     """Create a new trade entry with an optional screenshot"""
     trade_dict = {
+        "account_id": account_id,
         "date": date,
         "pair": pair,
         "direction": direction,
@@ -152,26 +266,64 @@ async def create_trade(
     result = await trades_collection.insert_one(trade_dict)
 
     if result.inserted_id:
+        await invalidate_stats(account_id)
         # Retrieve the created trade
-        created_trade = await trades_collection.find_one({"id": trade_dict["id"]})
+        created_trade = await trades_collection.find_one({"account_id": account_id, "id": trade_dict["id"]})
         return trade_helper(created_trade)
 
     raise HTTPException(status_code=400, detail="Trade creation failed")
 
+@app.post("/api/trades/import")
+async def import_trades(
+    statement: UploadFile = File(...),
+    account_id: str = Form(DEFAULT_ACCOUNT_ID)
+):
+    """Import an MT4/MT5 or cTrader statement, skipping deals that were already imported"""
+    try:
+        return await import_statement(
+            trades_collection, statement.file, statement.filename, account_id, validate=TradeBase
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid statement: {str(e)}")
+    finally:
+        await invalidate_stats(account_id)
+
+# Helper function to build the MongoDB filter shared by the trade listing endpoints
+def trade_filter(
+    account_id: str,
+    pair: Optional[str] = None,
+    direction: Optional[str] = None,
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None
+) -> dict:
+    query = {"account_id": account_id}
+
+    if pair:
+        query["pair"] = {"$regex": pair, "$options": "i"}
+    if direction:
+        query["direction"] = direction
+    if date_from or date_to:
+        # Dates are stored as YYYY-MM-DD strings, which sort chronologically
+        query["date"] = {}
+        if date_from:
+            query["date"]["$gte"] = date_from
+        if date_to:
+            query["date"]["$lte"] = date_to
+
+    return query
+
 @app.get("/api/trades", response_model=List[Trade])
 async def get_trades(
+    account_id: str = DEFAULT_ACCOUNT_ID,
     skip: int = 0, 
     limit: int = 1000,
     pair: Optional[str] = None,
-    direction: Optional[str] = None
+    direction: Optional[str] = None,
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None
 ):
     """Get all trades with optional filtering"""
-    query = {}
-    
-    if pair:
-        query["pair"] = {"$regex": pair, "$options": "i"}
-    if direction:
-        query["direction"] = direction
+    query = trade_filter(account_id, pair, direction, date_from, date_to)
     
     trades = []
     cursor = trades_collection.find(query).skip(skip).limit(limit).sort("date", -1)
@@ -181,10 +333,42 @@ async def get_trades(
     
     return trades
 
+@app.get("/api/trades/search", response_model=List[Trade])
+async def search_trades(
+    q: str,
+    account_id: str = DEFAULT_ACCOUNT_ID,
+    skip: int = 0,
+    limit: int = 50,
+    pair: Optional[str] = None,
+    direction: Optional[str] = None,
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None
+):
+    """Full-text search over trade notes and pairs, ranked by relevance"""
+    if not q.strip():
+        raise HTTPException(status_code=400, detail="Search query must not be empty")
+
+    query = trade_filter(account_id, pair, direction, date_from, date_to)
+    query["$text"] = {"$search": q}
+    score = {"score": {"$meta": "textScore"}}
+
+    trades = []
+    cursor = (
+        trades_collection.find(query, score)
+        .sort([("score", {"$meta": "textScore"}), ("date", -1)])
+        .skip(skip)
+        .limit(limit)
+    )
+
+    async for trade in cursor:
+        trades.append(trade_helper(trade))
+
+    return trades
+
 @app.get("/api/trades/{trade_id}", response_model=Trade)
-async def get_trade(trade_id: str):
+async def get_trade(trade_id: str, account_id: str = DEFAULT_ACCOUNT_ID):
     """Get a specific trade by ID"""
-    trade = await trades_collection.find_one({"id": trade_id})
+    trade = await trades_collection.find_one({"account_id": account_id, "id": trade_id})
     
     if trade:
         return trade_helper(trade)
@@ -194,6 +378,7 @@ async def get_trade(trade_id: str):
 @app.put("/api/trades/{trade_id}", response_model=Trade)
 async def update_trade(
     trade_id: str,
+    account_id: str = DEFAULT_ACCOUNT_ID,
     date: str = Form(None),
     pair: str = Form(None),
     direction: str = Form(None),
@@ -207,7 +392,7 @@ async def update_trade(
     screenshot: Optional[UploadFile] = File(None)
 ):
     """Update an existing trade"""
-    existing_trade = await trades_collection.find_one({"id": trade_id})
+    existing_trade = await trades_collection.find_one({"account_id": account_id, "id": trade_id})
     if not existing_trade:
         raise HTTPException(status_code=404, detail="Trade not found")
 
@@ -246,92 +431,155 @@ async def update_trade(
     if update_data:
         update_data["updated_at"] = datetime.utcnow()
         result = await trades_collection.update_one(
-            {"id": trade_id},
+            {"account_id": account_id, "id": trade_id},
             {"$set": update_data}
         )
+        await invalidate_stats(account_id)
 
     # Return updated trade data
-    updated_trade = await trades_collection.find_one({"id": trade_id})
+    updated_trade = await trades_collection.find_one({"account_id": account_id, "id": trade_id})
     return trade_helper(updated_trade)
 
 @app.delete("/api/trades/{trade_id}")
-async def delete_trade(trade_id: str):
+async def delete_trade(trade_id: str, account_id: str = DEFAULT_ACCOUNT_ID):
     """Delete a trade"""
-    result = await trades_collection.delete_one({"id": trade_id})
+    result = await trades_collection.delete_one({"account_id": account_id, "id": trade_id})
     
     if result.deleted_count == 1:
+        await invalidate_stats(account_id)
         return {"message": "Trade deleted successfully"}
     
     raise HTTPException(status_code=404, detail="Trade not found")
 
+# Helper function to calculate the statistics summary of a list of trades
+def calculate_stats(trades: List[dict]) -> dict:
+    if not trades:
+        return {
+            "total_trades": 0,
+            "winning_trades": 0,
+            "losing_trades": 0,
+            "total_profit": 0.0,
+            "win_rate": 0.0,
+            "profit_factor": 0.0,
+            "average_win": 0.0,
+            "average_loss": 0.0,
+            "largest_win": 0.0,
+            "largest_loss": 0.0
+        }
+    
+    # Calculate statistics
+    total_trades = len(trades)
+    winning_trades = [t for t in trades if t["result_amount"] > 0]
+    losing_trades = [t for t in trades if t["result_amount"] < 0]
+    
+    total_profit = sum(t["result_amount"] for t in trades)
+    win_rate = (len(winning_trades) / total_trades * 100) if total_trades > 0 else 0
+    
+    # Calculate profit factor
+    gross_profit = sum(t["result_amount"] for t in winning_trades)
+    gross_loss = abs(sum(t["result_amount"] for t in losing_trades))
+    profit_factor = (gross_profit / gross_loss) if gross_loss > 0 else 0
+    
+    # Calculate averages
+    avg_win = (gross_profit / len(winning_trades)) if winning_trades else 0
+    avg_loss = (gross_loss / len(losing_trades)) if losing_trades else 0
+    
+    # Find largest win/loss
+    largest_win = max([t["result_amount"] for t in winning_trades]) if winning_trades else 0
+    largest_loss = min([t["result_amount"] for t in losing_trades]) if losing_trades else 0
+    
+    return {
+        "total_trades": total_trades,
+        "winning_trades": len(winning_trades),
+        "losing_trades": len(losing_trades),
+        "total_profit": round(total_profit, 2),
+        "win_rate": round(win_rate, 2),
+        "profit_factor": round(profit_factor, 2),
+        "average_win": round(avg_win, 2),
+        "average_loss": round(abs(avg_loss), 2),
+        "largest_win": round(largest_win, 2),
+        "largest_loss": round(largest_loss, 2)
+    }
+
+CSV_HEADERS = ["Date", "Pair", "Direction", "Entry Price", "Exit Price", "Stop Loss", "Take Profit", "Risk Amount", "Result Amount", "Notes"]
+
+# Helper function to convert a trade to a CSV export line
+def csv_line(trade: dict) -> str:
+    row = [
+        trade["date"],
+        trade["pair"],
+        trade["direction"],
+        str(trade["entry_price"]),
+        str(trade["exit_price"]),
+        str(trade["stop_loss"]) if trade["stop_loss"] else "",
+        str(trade["take_profit"]) if trade["take_profit"] else "",
+        str(trade["risk_amount"]),
+        str(trade["result_amount"]),
+        trade["notes"].replace(",", ";") if trade["notes"] else ""
+    ]
+    return ",".join(row) + "\n"
+
+def export_filename() -> str:
+    return f"trades_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+
+# Statistics summaries are cached per account and dropped whenever one of its trades changes.
+# Every invalidation bumps the account's generation, so stats computed from trades read
+# before a change are never stored over it.
+async def invalidate_stats(account_id: str):
+    await account_stats_collection.update_one(
+        {"account_id": account_id},
+        {"$inc": {"generation": 1}, "$unset": {"stats": ""}},
+        upsert=True
+    )
+
+async def get_stats_cache(account_id: str) -> dict:
+    """Get the account's cache entry, read before scanning its trades"""
+    cache = await account_stats_collection.find_one({"account_id": account_id})
+    # Accounts that were never cached or invalidated are at generation 0
+    return cache or {"account_id": account_id, "generation": 0}
+
+async def store_stats(account_id: str, generation: int, stats: dict):
+    # Accounts without trades are cheap to compute and may not exist at all; don't keep entries for them
+    if not stats["total_trades"]:
+        return
+    try:
+        await account_stats_collection.update_one(
+            {"account_id": account_id, "generation": generation},
+            {"$set": {"stats": stats, "updated_at": datetime.utcnow()}},
+            upsert=True
+        )
+    except DuplicateKeyError:
+        # The trades were invalidated since `generation` was read, so these stats are stale
+        pass
+
 @app.get("/api/trades/stats/summary")
-async def get_trade_stats():
+async def get_trade_stats(account_id: str = DEFAULT_ACCOUNT_ID):
     """Get trading statistics summary"""
     try:
-        # Get all trades
+        cache = await get_stats_cache(account_id)
+        if "stats" in cache:
+            return cache["stats"]
+
+        # Get all trades of the account
         trades = []
-        cursor = trades_collection.find({})
+        cursor = trades_collection.find({"account_id": account_id}, {"result_amount": 1})
         
         async for trade in cursor:
-            trades.append(trade_helper(trade))
-        
-        if not trades:
-            return {
-                "total_trades": 0,
-                "winning_trades": 0,
-                "losing_trades": 0,
-                "total_profit": 0.0,
-                "win_rate": 0.0,
-                "profit_factor": 0.0,
-                "average_win": 0.0,
-                "average_loss": 0.0,
-                "largest_win": 0.0,
-                "largest_loss": 0.0
-            }
-        
-        # Calculate statistics
-        total_trades = len(trades)
-        winning_trades = [t for t in trades if t["result_amount"] > 0]
-        losing_trades = [t for t in trades if t["result_amount"] < 0]
+            trades.append(trade)
         
-        total_profit = sum(t["result_amount"] for t in trades)
-        win_rate = (len(winning_trades) / total_trades * 100) if total_trades > 0 else 0
-        
-        # Calculate profit factor
-        gross_profit = sum(t["result_amount"] for t in winning_trades)
-        gross_loss = abs(sum(t["result_amount"] for t in losing_trades))
-        profit_factor = (gross_profit / gross_loss) if gross_loss > 0 else 0
-        
-        # Calculate averages
-        avg_win = (gross_profit / len(winning_trades)) if winning_trades else 0
-        avg_loss = (gross_loss / len(losing_trades)) if losing_trades else 0
-        
-        # Find largest win/loss
-        largest_win = max([t["result_amount"] for t in winning_trades]) if winning_trades else 0
-        largest_loss = min([t["result_amount"] for t in losing_trades]) if losing_trades else 0
-        
-        return {
-            "total_trades": total_trades,
-            "winning_trades": len(winning_trades),
-            "losing_trades": len(losing_trades),
-            "total_profit": round(total_profit, 2),
-            "win_rate": round(win_rate, 2),
-            "profit_factor": round(profit_factor, 2),
-            "average_win": round(avg_win, 2),
-            "average_loss": round(abs(avg_loss), 2),
-            "largest_win": round(largest_win, 2),
-            "largest_loss": round(largest_loss, 2)
-        }
+        stats = calculate_stats(trades)
+        await store_stats(account_id, cache["generation"], stats)
+        return stats
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error calculating stats: {str(e)}")
 
 @app.get("/api/trades/export/csv")
-async def export_trades_csv():
+async def export_trades_csv(account_id: str = DEFAULT_ACCOUNT_ID):
     """Export all trades as CSV data"""
     try:
         trades = []
-        cursor = trades_collection.find({}).sort("date", 1)
+        cursor = trades_collection.find({"account_id": account_id}).sort("date", 1)
         
         async for trade in cursor:
             trades.append(trade_helper(trade))
@@ -340,32 +588,139 @@ async def export_trades_csv():
             return {"data": "", "filename": "trades_export.csv"}
         
         # Create CSV content
-        headers = ["Date", "Pair", "Direction", "Entry Price", "Exit Price", "Stop Loss", "Take Profit", "Risk Amount", "Result Amount", "Notes"]
-        csv_content = ",".join(headers) + "\n"
+        csv_content = ",".join(CSV_HEADERS) + "\n"
         
         for trade in trades:
-            row = [
-                trade["date"],
-                trade["pair"],
-                trade["direction"],
-                str(trade["entry_price"]),
-                str(trade["exit_price"]),
-                str(trade["stop_loss"]) if trade["stop_loss"] else "",
-                str(trade["take_profit"]) if trade["take_profit"] else "",
-                str(trade["risk_amount"]),
-                str(trade["result_amount"]),
-                trade["notes"].replace(",", ";") if trade["notes"] else ""
-            ]
-            csv_content += ",".join(row) + "\n"
+            csv_content += csv_line(trade)
         
         return {
             "data": csv_content,
-            "filename": f"trades_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+            "filename": export_filename()
         }
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error exporting trades: {str(e)}")
 
+# Background jobs. Each job yields to the event loop every JOB_YIELD_EVERY trades
+# so interactive requests keep being served while it runs.
+JOB_YIELD_EVERY = 500
+
+async def export_csv_job(job, account_id: str):
+    total = await trades_collection.count_documents({"account_id": account_id})
+    cursor = trades_collection.find({"account_id": account_id}).sort("date", 1)
+    filename = export_filename()
+
+    exported = 0
+    with open(job.result_path(".csv"), "w", encoding="utf-8") as f:
+        f.write(",".join(CSV_HEADERS) + "\n")
+        async for trade in cursor:
+            f.write(csv_line(trade_helper(trade)))
+            exported += 1
+            if exported % JOB_YIELD_EVERY == 0:
+                await job.progress(exported, total)
+                await asyncio.sleep(0)
+
+    return {"exported": exported, "filename": filename}
+
+async def import_statement_job(job, account_id: str, path: str, filename: str):
+    # The runner deletes the uploaded copy at `path` once the job ends
+    size = os.path.getsize(path)
+    try:
+        with open(path, "rb") as stream:
+            async def progress():
+                await job.progress(stream.tell(), size)
+
+            return await import_statement(
+                trades_collection, stream, filename, account_id, validate=TradeBase, progress=progress
+            )
+    finally:
+        await invalidate_stats(account_id)
+
+async def stats_job(job, account_id: str):
+    cache = await get_stats_cache(account_id)
+    total = await trades_collection.count_documents({"account_id": account_id})
+    cursor = trades_collection.find({"account_id": account_id}, {"result_amount": 1})
+
+    trades = []
+    async for trade in cursor:
+        trades.append(trade)
+        if len(trades) % JOB_YIELD_EVERY == 0:
+            await job.progress(len(trades), total)
+            await asyncio.sleep(0)
+
+    stats = calculate_stats(trades)
+    await store_stats(account_id, cache["generation"], stats)
+    with open(job.result_path(".json"), "w", encoding="utf-8") as f:
+        json.dump(stats, f)
+    return stats
+
+@app.post("/api/jobs/export/csv", response_model=Job)
+async def start_export_job(account_id: str = DEFAULT_ACCOUNT_ID):
+    """Export all trades to a CSV file in the background"""
+    job = await job_runner.submit(account_id, "export_csv", export_csv_job, account_id)
+    return job_helper(job)
+
+@app.post("/api/jobs/import", response_model=Job)
+async def start_import_job(
+    statement: UploadFile = File(...),
+    account_id: str = Form(DEFAULT_ACCOUNT_ID)
+):
+    """Import a broker statement in the background"""
+    # The upload is closed once the request finishes, so keep a copy for the job
+    file_extension = os.path.splitext(statement.filename)[1]
+    path = os.path.join(JOBS_DIR, f"upload_{uuid.uuid4()}{file_extension}")
+    with open(path, "wb") as buffer:
+        shutil.copyfileobj(statement.file, buffer)
+
+    job = await job_runner.submit(
+        account_id, "import_statement", import_statement_job, account_id, path, statement.filename,
+        input_file=path
+    )
+    return job_helper(job)
+
+@app.post("/api/jobs/stats", response_model=Job)
+async def start_stats_job(account_id: str = DEFAULT_ACCOUNT_ID):
+    """Recalculate the trading statistics summary in the background"""
+    job = await job_runner.submit(account_id, "stats", stats_job, account_id)
+    return job_helper(job)
+
+@app.get("/api/jobs", response_model=List[Job])
+async def get_jobs(account_id: str = DEFAULT_ACCOUNT_ID, skip: int = 0, limit: int = 50):
+    """Get background jobs, most recent first"""
+    jobs = []
+    cursor = jobs_collection.find({"account_id": account_id}).sort("created_at", -1).skip(skip).limit(limit)
+
+    async for job in cursor:
+        jobs.append(job_helper(job))
+
+    return jobs
+
+@app.get("/api/jobs/{job_id}", response_model=Job)
+async def get_job(job_id: str, account_id: str = DEFAULT_ACCOUNT_ID):
+    """Get the status and progress of a background job"""
+    job = await jobs_collection.find_one({"account_id": account_id, "id": job_id})
+
+    if job:
+        return job_helper(job)
+
+    raise HTTPException(status_code=404, detail="Job not found")
+
+@app.get("/api/jobs/{job_id}/result")
+async def download_job_result(job_id: str, account_id: str = DEFAULT_ACCOUNT_ID):
+    """Download the file produced by a completed background job"""
+    job = await jobs_collection.find_one({"account_id": account_id, "id": job_id})
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job["status"] != COMPLETED:
+        raise HTTPException(status_code=409, detail=f"Job is {job['status']}")
+
+    path = job_runner.result_path(job)
+    if not path or not os.path.exists(path):
+        raise HTTPException(status_code=404, detail="Job has no result file")
+
+    result = job.get("result") or {}
+    return FileResponse(path, filename=result.get("filename", os.path.basename(path)))
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8001)
\ No newline at end of file
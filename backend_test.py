@@ -131,6 +131,53 @@ class TradeJournalAPITester:
         )
         return success1 and success2
 
+    def test_search_trades(self):
+        """Test full-text search over notes, combined with filters"""
+        success1, results = self.run_test(
+            "Search Trades (Notes)",
+            "GET",
+            "api/trades/search",
+            200,
+            params={"q": "stop loss"}
+        )
+        success2, _ = self.run_test(
+            "Search Trades (With Filters)",
+            "GET",
+            "api/trades/search",
+            200,
+            params={"q": "momentum", "direction": "buy", "date_from": "2024-01-01", "date_to": "2024-12-31"}
+        )
+        success3, _ = self.run_test(
+            "Search Trades (Empty Query)",
+            "GET",
+            "api/trades/search",
+            400,
+            params={"q": " "}
+        )
+        return success1 and success2 and success3
+
+    def test_account_scoping(self):
+        """Test that trades and stats are scoped by account"""
+        success1, accounts = self.run_test("Get Accounts", "GET", "api/accounts", 200)
+        success2, trades = self.run_test(
+            "Get Trades (Unknown Account)",
+            "GET",
+            "api/trades",
+            200,
+            params={"account_id": f"test-{uuid.uuid4()}"}
+        )
+        success3, stats = self.run_test(
+            "Get Trading Stats (Unknown Account)",
+            "GET",
+            "api/trades/stats/summary",
+            200,
+            params={"account_id": f"test-{uuid.uuid4()}"}
+        )
+        scoped = trades == [] and stats.get("total_trades") == 0
+        if not scoped:
+            print("❌ Unknown account should have no trades")
+        return success1 and success2 and success3 and scoped
+
 def main():
     print("🚀 Starting Trade Journal API Tests...")
     print("=" * 50)
@@ -253,6 +300,12 @@ def main():
     # Test filtering
     tester.test_get_trades_with_filters()
     
+    # Test full-text search
+    tester.test_search_trades()
+    
+    # Test account scoping
+    tester.test_account_scoping()
+    
     print("\n📋 Phase 4: Cleanup & Delete Tests")
     print("-" * 30)
     
@@ -0,0 +1,129 @@
+import io
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+from ingest import _parse_float, parse_statement  # noqa: E402
+
+MT4_STATEMENT = """<html><body><table>
+<tr><td colspan=14><b>Closed Transactions:</b></td></tr>
+<tr><td>Ticket</td><td>Open Time</td><td>Type</td><td>Size</td><td>Item</td><td>Price</td><td>S / L</td><td>T / P</td>
+<td>Close Time</td><td>Price</td><td>Commission</td><td>Taxes</td><td>Swap</td><td>Profit</td></tr>
+<tr><td>1001</td><td>2025.07.28 10:15:02</td><td>buy</td><td>0.01</td><td>gbpusd.m</td><td>1.34414</td><td>1.34314</td><td>0.00000</td>
+<td>2025.07.28 11:00:00</td><td>1.34444</td><td>0.00</td><td>0.00</td><td>0.00</td><td>0.30</td></tr>
+<tr><td>1002</td><td>2025.07.30 09:00:00</td><td>balance</td><td colspan=10>Deposit</td><td>100.00</td></tr>
+<tr><td>1003</td><td>2025.07.31 14:20:00</td><td>sell</td><td>0.01</td><td>gbpusd.m</td><td>1.32221</td><td>0.00000</td><td>0.00000</td>
+<td>2025.07.31 15:00:00</td><td>1.32257</td><td>-0.05</td><td>0.00</td><td>0.00</td><td>-0.36</td></tr>
+<tr><td colspan=14><b>Open Trades:</b></td></tr>
+<tr><td>Ticket</td><td>Open Time</td><td>Type</td><td>Size</td><td>Item</td><td>Price</td><td>S / L</td><td>T / P</td>
+<td>&nbsp;</td><td>Price</td><td>Commission</td><td>Taxes</td><td>Swap</td><td>Profit</td></tr>
+<tr><td>1004</td><td>2025.08.01 08:00:00</td><td>sell</td><td>0.01</td><td>gbpusd.m</td><td>1.32291</td><td>0.00000</td><td>0.00000</td>
+<td>&nbsp;</td><td>1.31636</td><td>0.00</td><td>0.00</td><td>0.00</td><td>6.55</td></tr>
+<tr><td colspan=14><b>Working Orders:</b></td></tr>
+</table></body></html>
+"""
+
+CTRADER_STATEMENT = (
+    "ID;Symbol;Opening Direction;Opening Time;Closing Time;Entry Price;Closing Price;Closing Quantity;Net $\n"
+    "55;EURUSD;Sell;01/08/2025 09:30:00.120;01/08/2025 10:00:01.500;1,08500;1,08400;1000;1,00\n"
+)
+
+
+def test_parse_mt4_html_statement():
+    trades = list(parse_statement(io.BytesIO(MT4_STATEMENT.encode("utf-8")), "statement.htm"))
+
+    assert len(trades) == 2
+    buy, sell = trades
+    assert buy["date"] == "2025-07-28"
+    assert buy["pair"] == "gbpusd.m"
+    assert buy["direction"] == "buy"
+    assert buy["entry_price"] == 1.34414
+    assert buy["exit_price"] == 1.34444
+    assert buy["stop_loss"] == 1.34314
+    assert buy["take_profit"] is None
+    assert buy["risk_amount"] == 1.0
+    assert sell["result_amount"] == -0.41
+    assert sell["risk_amount"] == 0.0
+
+
+def test_parse_utf16_ctrader_csv():
+    data = CTRADER_STATEMENT.encode("utf-16")
+    trades = list(parse_statement(io.BytesIO(data), "history.csv"))
+
+    assert len(trades) == 1
+    assert trades[0]["date"] == "2025-08-01"
+    assert trades[0]["direction"] == "sell"
+    assert trades[0]["entry_price"] == 1.085
+    assert trades[0]["result_amount"] == 1.0
+
+
+def test_fingerprint_is_stable_across_overlapping_statements():
+    first = list(parse_statement(io.BytesIO(MT4_STATEMENT.encode("utf-8")), "january.htm"))
+    second = list(parse_statement(io.BytesIO(MT4_STATEMENT.encode("utf-8")), "february.htm"))
+
+    assert [t["fingerprint"] for t in first] == [t["fingerprint"] for t in second]
+    assert first[0]["fingerprint"] != first[1]["fingerprint"]
+
+
+def test_fingerprint_ignores_date_format():
+    header = "Ticket,Symbol,Type,Open Time,Close Time,Open Price,Close Price,Profit\n"
+    dotted = header + "1001,GBPUSD,buy,2025.07.28 10:15:02,2025.07.28 11:00:00,1.34414,1.34444,0.30\n"
+    dashed = header + "1001,GBPUSD,buy,2025-07-28 10:15:02.250,2025-07-28T11:00:00,1.34414,1.34444,0.30\n"
+
+    first = list(parse_statement(io.BytesIO(dotted.encode("utf-8")), "mt5.csv"))
+    second = list(parse_statement(io.BytesIO(dashed.encode("utf-8")), "export.csv"))
+
+    assert first[0]["fingerprint"] == second[0]["fingerprint"]
+
+
+def test_parse_ctrader_currency_named_pnl_columns():
+    data = (
+        "ID,Symbol,Opening Direction,Opening Time,Closing Time,Entry Price,Closing Price,Gross USD,Net USD\n"
+        "56,EURUSD,Buy,01/08/2025 09:30:00,01/08/2025 10:00:00,1.08400,1.08500,10.00,9.50\n"
+    ).encode("utf-8")
+    trades = list(parse_statement(io.BytesIO(data), "history.csv"))
+
+    assert len(trades) == 1
+    assert trades[0]["result_amount"] == 9.5
+
+
+@pytest.mark.parametrize("statement", [
+    # Balance operations only
+    "<table><tr><td>Time</td><td>Deal</td><td>Type</td><td>Comment</td><td>Amount</td></tr>"
+    "<tr><td>2025.07.30 09:00:00</td><td>1</td><td>balance</td><td>Deposit</td><td>100.00</td></tr></table>",
+    # MT4 open positions only
+    MT4_STATEMENT[MT4_STATEMENT.index("<tr><td colspan=14><b>Open Trades:"):],
+])
+def test_statement_without_trades_table_is_rejected(statement):
+    with pytest.raises(ValueError, match="No trades table"):
+        list(parse_statement(io.BytesIO(statement.encode("utf-8")), "statement.htm"))
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("1.234,56", 1234.56),
+    ("1,234.56", 1234.56),
+    ("1 234,56", 1234.56),
+    ("1\xa0234.56", 1234.56),
+    ("1,000.00", 1000.0),
+    ("-2,28", -2.28),
+    ("1,08500", 1.085),
+    ("1.000.000", 1000000.0),
+    ("0.01 Lots", 0.01),
+])
+def test_parse_float_detects_decimal_separator(value, expected):
+    assert _parse_float(value) == expected
+
+
+def test_parse_float_uses_statement_convention_when_ambiguous():
+    assert _parse_float("1,000", decimal=".") == 1000.0
+    assert _parse_float("1,000", decimal=",") == 1.0
+    assert _parse_float("148.500", decimal=".") == 148.5
+
+
+@pytest.mark.parametrize("value", ["1,000", "1.234,5.6", "12,34.56", "n/a"])
+def test_parse_float_rejects_unreadable_numbers(value):
+    with pytest.raises(ValueError):
+        _parse_float(value)
@@ -0,0 +1,187 @@
+import asyncio
+import os
+import sys
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+from jobs import FAILED, RUNNING, JobRunner  # noqa: E402
+
+
+class MemoryCollection:
+    """Just enough of a Motor collection for the job runner."""
+
+    def __init__(self):
+        self.docs = {}
+
+    async def insert_one(self, doc):
+        self.docs[doc["id"]] = dict(doc)
+
+    def _matches(self, doc, query):
+        for key, condition in query.items():
+            value = doc.get(key)
+            if isinstance(condition, dict):
+                if "$in" in condition and value not in condition["$in"]:
+                    return False
+                if "$lt" in condition and not (value is not None and value < condition["$lt"]):
+                    return False
+            elif value != condition:
+                return False
+        return True
+
+    async def find(self, query):
+        for doc in [d for d in self.docs.values() if self._matches(d, query)]:
+            yield dict(doc)
+
+    async def update_one(self, query, update):
+        self.docs[query["id"]].update(update["$set"])
+
+    async def update_many(self, query, update):
+        for doc in self.docs.values():
+            if self._matches(doc, query):
+                doc.update(update["$set"])
+
+    async def delete_many(self, query):
+        for job_id in [d["id"] for d in self.docs.values() if self._matches(d, query)]:
+            del self.docs[job_id]
+
+
+def test_jobs_run_with_bounded_concurrency(tmp_path):
+    async def scenario():
+        collection = MemoryCollection()
+        runner = JobRunner(collection, str(tmp_path), max_workers=2)
+        running = 0
+        peak = 0
+
+        async def work(job, value):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await job.progress(1, 2)
+            with open(job.result_path(".txt"), "w") as f:
+                f.write(str(value))
+            await asyncio.sleep(0.01)
+            running -= 1
+            return {"value": value}
+
+        jobs = [await runner.submit("default", "test", work, i) for i in range(5)]
+        assert all(collection.docs[job["id"]]["status"] == "queued" for job in jobs)
+
+        await asyncio.gather(*runner._tasks)
+        return collection, runner, jobs, peak
+
+    collection, runner, jobs, peak = asyncio.run(scenario())
+
+    assert peak == 2
+    for i, job in enumerate(jobs):
+        record = collection.docs[job["id"]]
+        assert record["status"] == "completed"
+        assert record["progress"] == 100
+        assert record["result"] == {"value": i}
+        with open(runner.result_path(record)) as f:
+            assert f.read() == str(i)
+
+
+def test_failed_job_records_error_and_removes_files(tmp_path):
+    upload = tmp_path / "upload.csv"
+    upload.write_text("statement")
+
+    async def scenario():
+        collection = MemoryCollection()
+        runner = JobRunner(collection, str(tmp_path))
+
+        async def work(job):
+            with open(job.result_path(".csv"), "w") as f:
+                f.write("partial")
+            raise ValueError("broken statement")
+
+        job = await runner.submit("default", "test", work, input_file=str(upload))
+        await asyncio.gather(*runner._tasks)
+        return collection.docs[job["id"]]
+
+    record = asyncio.run(scenario())
+
+    assert record["status"] == "failed"
+    assert record["error"] == "broken statement"
+    assert record["result_file"] is None
+    assert not upload.exists()
+    assert not (tmp_path / f"{record['id']}.csv").exists()
+
+
+def test_completed_job_removes_input_file(tmp_path):
+    upload = tmp_path / "upload.csv"
+    upload.write_text("statement")
+
+    async def scenario():
+        collection = MemoryCollection()
+        runner = JobRunner(collection, str(tmp_path))
+
+        async def work(job):
+            return {}
+
+        job = await runner.submit("default", "test", work, input_file=str(upload))
+        await asyncio.gather(*runner._tasks)
+        return collection.docs[job["id"]]
+
+    assert asyncio.run(scenario())["status"] == "completed"
+    assert not upload.exists()
+
+
+def test_recover_fails_interrupted_jobs_and_removes_files(tmp_path):
+    upload = tmp_path / "upload.csv"
+    upload.write_text("statement")
+    partial = tmp_path / "interrupted.csv"
+    partial.write_text("partial")
+
+    async def scenario():
+        collection = MemoryCollection()
+        collection.docs["interrupted"] = {"id": "interrupted", "status": RUNNING, "input_file": str(upload)}
+        await JobRunner(collection, str(tmp_path)).recover()
+        return collection.docs["interrupted"]
+
+    record = asyncio.run(scenario())
+
+    assert record["status"] == FAILED
+    assert not upload.exists()
+    assert not partial.exists()
+
+
+def test_purge_removes_expired_jobs(tmp_path):
+    result = tmp_path / "old.csv"
+    result.write_text("export")
+
+    async def scenario():
+        collection = MemoryCollection()
+        collection.docs["old"] = {
+            "id": "old",
+            "status": "completed",
+            "result_file": "old.csv",
+            "finished_at": datetime.utcnow() - timedelta(days=30),
+        }
+        collection.docs["new"] = {"id": "new", "status": "completed", "finished_at": datetime.utcnow()}
+        await JobRunner(collection, str(tmp_path)).purge(timedelta(days=7))
+        return collection.docs
+
+    docs = asyncio.run(scenario())
+
+    assert list(docs) == ["new"]
+    assert not result.exists()
+
+
+def test_purging_repeats_on_schedule(tmp_path):
+    async def scenario():
+        collection = MemoryCollection()
+        runner = JobRunner(collection, str(tmp_path))
+        runner.start_purging(timedelta(days=7), timedelta(seconds=0.01))
+        await asyncio.sleep(0.005)
+        # Expires while the server is up, after the first purge
+        collection.docs["old"] = {
+            "id": "old",
+            "status": "completed",
+            "finished_at": datetime.utcnow() - timedelta(days=30),
+        }
+        await asyncio.sleep(0.05)
+        runner.stop_purging()
+        return collection.docs
+
+    assert asyncio.run(scenario()) == {}
@@ -0,0 +1,124 @@
+import asyncio
+import importlib
+import os
+import sys
+
+import pytest
+from pymongo.errors import DuplicateKeyError
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+
+class MemoryStatsCollection:
+    """Just enough of a Motor collection for the per-account stats cache."""
+
+    def __init__(self):
+        self.docs = {}
+        self.writes = 0
+
+    async def find_one(self, query):
+        doc = self.docs.get(query["account_id"])
+        return dict(doc) if doc is not None else None
+
+    async def update_one(self, query, update, upsert=False):
+        self.writes += 1
+        doc = self.docs.get(query["account_id"])
+        matches = doc is not None and all(doc.get(key) == value for key, value in query.items())
+        if not matches:
+            if not upsert:
+                return
+            if doc is not None:
+                # account_id is unique, like the real index
+                raise DuplicateKeyError("account_id")
+            doc = self.docs[query["account_id"]] = dict(query)
+        for key, value in update.get("$inc", {}).items():
+            doc[key] = doc.get(key, 0) + value
+        for key in update.get("$unset", {}):
+            doc.pop(key, None)
+        doc.update(update.get("$set", {}))
+
+
+class MemoryTradesCollection:
+    """Trades whose cursor can run a callback halfway through, like a concurrent write."""
+
+    def __init__(self, trades):
+        self.trades = trades
+        self.during_scan = None
+
+    def find(self, query, projection=None):
+        async def cursor():
+            for i, trade in enumerate(list(self.trades)):
+                if i == 1 and self.during_scan is not None:
+                    await self.during_scan()
+                yield dict(trade)
+        return cursor()
+
+
+@pytest.fixture
+def server(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "uploads").mkdir()
+    sys.modules.pop("server", None)
+    module = importlib.import_module("server")
+    monkeypatch.setattr(module, "account_stats_collection", MemoryStatsCollection())
+    return module
+
+
+def test_stats_are_cached_until_invalidated(server, monkeypatch):
+    trades = MemoryTradesCollection([{"result_amount": 10.0}])
+    monkeypatch.setattr(server, "trades_collection", trades)
+
+    async def scenario():
+        first = await server.get_trade_stats("acc")
+        trades.trades.append({"result_amount": -5.0})
+        cached = await server.get_trade_stats("acc")
+        await server.invalidate_stats("acc")
+        fresh = await server.get_trade_stats("acc")
+        return first, cached, fresh
+
+    first, cached, fresh = asyncio.run(scenario())
+
+    assert first["total_trades"] == 1
+    assert cached == first
+    assert fresh["total_trades"] == 2
+
+
+def test_stats_computed_during_invalidation_are_not_cached(server, monkeypatch):
+    trades = MemoryTradesCollection([{"result_amount": 10.0}, {"result_amount": 20.0}])
+    monkeypatch.setattr(server, "trades_collection", trades)
+
+    async def write_during_scan():
+        trades.trades.append({"result_amount": -5.0})
+        await server.invalidate_stats("acc")
+
+    async def scenario():
+        trades.during_scan = write_during_scan
+        stale = await server.get_trade_stats("acc")
+        cache = dict(server.account_stats_collection.docs["acc"])
+        trades.during_scan = None
+        return stale, cache, await server.get_trade_stats("acc")
+
+    stale, cache, fresh = asyncio.run(scenario())
+
+    assert stale["total_trades"] == 2
+    assert "stats" not in cache
+    assert fresh["total_trades"] == 3
+
+
+def test_cache_hits_and_empty_accounts_do_not_write(server, monkeypatch):
+    trades = MemoryTradesCollection([{"result_amount": 10.0}])
+    monkeypatch.setattr(server, "trades_collection", trades)
+    cache = server.account_stats_collection
+
+    async def scenario():
+        await server.get_trade_stats("acc")
+        writes = cache.writes
+        await server.get_trade_stats("acc")
+        assert cache.writes == writes
+
+        trades.trades.clear()
+        await server.get_trade_stats("test-unknown")
+
+    asyncio.run(scenario())
+
+    assert "test-unknown" not in cache.docs